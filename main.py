@@ -11,7 +11,9 @@ Este script ejecuta el pipeline completo:
 
 import pandas as pd
 import os
+import cv2
 import importlib.util
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Obtener el directorio base del proyecto (donde está main.py)
@@ -43,6 +45,53 @@ ThermalAnalyzer = processing_module.ThermalAnalyzer
 
 NOMBRE_CSV = 'csv/TK 103_1.xlsx-Hoja1.csv'
 OUTPUT_CSV = 'resultados_completos.csv'
+N_WORKERS = None  # Procesos para analizar imágenes (None = todos los núcleos)
+
+ANALYZER_PARAMS = {
+    'img_height': 512,
+    'img_width': 640,
+    'smoothing_sigma': 3,
+    'normalize': True
+}
+
+
+# ============================================================================
+# PROCESAMIENTO PARALELO DE IMÁGENES
+# ============================================================================
+
+# Analizador propio de cada proceso worker (se crea una vez en el initializer)
+_worker_analyzer = None
+
+
+def _init_worker(analyzer_params):
+    """
+    Inicializa un proceso worker creando su propio ThermalAnalyzer.
+    
+    Args:
+        analyzer_params (dict): Parámetros para construir el ThermalAnalyzer.
+    """
+    global _worker_analyzer
+    
+    # El paralelismo viene del pool de procesos: un hilo de OpenCV por worker
+    # evita la sobresuscripción (workers x hilos de OpenCV), manteniendo
+    # activos los kernels SIMD optimizados
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(1)
+    
+    _worker_analyzer = ThermalAnalyzer(**analyzer_params)
+
+
+def _procesar_imagen(img_path):
+    """
+    Procesa una imagen térmica en un proceso worker.
+    
+    Args:
+        img_path (str): Ruta a la imagen térmica.
+    
+    Returns:
+        dict: Features extraídas por ThermalAnalyzer.process_image.
+    """
+    return _worker_analyzer.process_image(img_path)
 
 
 # ============================================================================
@@ -92,25 +141,43 @@ def main():
     
     print("\n🌡️  PASO 3: Procesando imágenes térmicas...")
     
-    # Crear analizador térmico
-    analyzer = ThermalAnalyzer(
-        img_height=512,
-        img_width=640,
-        smoothing_sigma=3,
-        normalize=True
-    )
+    # Crear analizador térmico (para las salidas por defecto)
+    analyzer = ThermalAnalyzer(**ANALYZER_PARAMS)
+    
+    # Rutas de las filas con imagen vinculada y existente (None si no hay)
+    rutas = [
+        ruta if isinstance(ruta, str) and os.path.exists(ruta) else None
+        for ruta in df['imagen_path']
+    ]
     
     # Procesar cada imagen vinculada
     thermal_features = []
     procesadas_exitosas = 0
     procesadas_con_error = 0
     
-    for idx, row in df.iterrows():
-        if pd.notna(row['imagen_path']) and os.path.exists(row['imagen_path']):
-            print(f"   Procesando: {os.path.basename(row['imagen_path'])}...", end=' ')
+    # Las imágenes son independientes: se reparten entre procesos y los
+    # resultados se recogen en el orden de las filas
+    with ProcessPoolExecutor(
+        max_workers=N_WORKERS,
+        initializer=_init_worker,
+        initargs=(ANALYZER_PARAMS,)
+    ) as executor:
+        futuros = {
+            idx: executor.submit(_procesar_imagen, ruta)
+            for idx, ruta in enumerate(rutas)
+            if ruta is not None
+        }
+        
+        for idx, ruta in enumerate(rutas):
+            if ruta is None:
+                # No hay imagen vinculada
+                thermal_features.append(analyzer._default_output('no_image'))
+                continue
+            
+            print(f"   Procesando: {os.path.basename(ruta)}...", end=' ')
             
             try:
-                features = analyzer.process_image(row['imagen_path'])
+                features = futuros[idx].result()
                 
                 if features.get('status') == 'success':
                     procesadas_exitosas += 1
@@ -125,9 +192,6 @@ def main():
                 print(f"❌ Error: {e}")
                 thermal_features.append(analyzer._default_output('processing_error'))
                 procesadas_con_error += 1
-        else:
-            # No hay imagen vinculada
-            thermal_features.append(analyzer._default_output('no_image'))
     
     print(f"\n   ✓ Procesadas exitosamente: {procesadas_exitosas}")
     if procesadas_con_error > 0:
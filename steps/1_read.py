@@ -26,6 +26,10 @@ PROCESO:
 
 NOMBRE_CSV = 'csv/TK 103_1.xlsx-Hoja1.csv'
 
+# Patrones compilados una sola vez (se aplican por columna y por archivo)
+PATRON_NUMERO = re.compile(r'(-?\d+\.?\d*)')
+PATRON_IMAGEN = re.compile(r'Imagen(\d+)', re.IGNORECASE)
+
 # ============================================================================
 # PASO 1: LEER DATOS DEL EXCEL
 # ============================================================================
@@ -66,13 +70,13 @@ def limpiar_datos(df):
         df['Imagen'] = df['Imagen'].str.replace(r'..\\', '', regex=False)
     
     # 3. Convertir columnas de texto ('object') a números (float)
-    def limpiar_a_numero(texto):
-        if isinstance(texto, str):
-            texto = texto.replace(',', '.')  # Reemplaza coma decimal
-            match = re.search(r'(-?\d+\.?\d*)', texto) # Busca el primer número
-            if match:
-                return float(match.group(1))
-        return None 
+    # Vectorizado sobre la columna completa con los métodos .str de pandas
+    def limpiar_a_numero(columna):
+        if pd.api.types.is_numeric_dtype(columna):
+            return columna.astype(float)  # Ya es numérica: no pasar por texto
+        texto =columna.astype('string').str.replace(',', '.', regex=False)  # Reemplaza coma decimal
+        numero = texto.str.extract(PATRON_NUMERO, expand=False)  # Busca el primer número
+        return numero.astype(float)
 
     columnas_a_limpiar = [
         'Caudal', 'Nivel TK %', 'T_TK', 'T_amb', 'Humedad Relativa', 
@@ -83,7 +87,7 @@ def limpiar_datos(df):
     for col in columnas_a_limpiar:
         if col in df.columns:
             print(f"  - Convirtiendo '{col}'...")
-            df[col] = df[col].apply(limpiar_a_numero)
+            df[col] = limpiar_a_numero(df[col])
         else:
             # ¡Este mensaje nos dirá si no encuentra el nombre de la columna!
             print(f"  - ADVERTENCIA: No se encontró la columna '{col}' para limpiar.")
@@ -118,7 +122,7 @@ def vincular_imagenes_a_data(df):
         # Filtrar solo archivos de imagen
         if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp')):
             # Extraer número de imagen (ej: "Imagen1.png" -> 1, "Imagen10.jpg" -> 10)
-            match = re.search(r'Imagen(\d+)', filename, re.IGNORECASE)
+            match = PATRON_IMAGEN.search(filename)
             if match:
                 img_num = int(match.group(1))
                 img_path = os.path.join(imagenes_dir, filename)
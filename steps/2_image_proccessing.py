@@ -57,7 +57,7 @@ class ThermalAnalyzer:
             'crudo':     (180, 255)    # Capa de crudo
         }
 
-    def process_image(self, img_path):
+    def process_image(self, img_path, image=None):
         """
         Procesa una imagen térmica y extrae features.
         
@@ -70,6 +70,8 @@ class ThermalAnalyzer:
         
         Args:
             img_path (str): Ruta a la imagen térmica.
+            image (np.ndarray, optional): Imagen ya cargada con _load_image. Si se
+                proporciona, se usa directamente y no se vuelve a leer img_path.
         
         Returns:
             dict: Diccionario con features extraídas:
@@ -89,12 +91,12 @@ class ThermalAnalyzer:
                 - thermal_gradient_std: Desviación estándar del gradiente
                 - status: Estado del procesamiento
         """
-        if not os.path.exists(img_path):
+        if image is None and not os.path.exists(img_path):
             return self._default_output("not_found")
 
         try:
-            # Cargar y preprocesar imagen
-            img = self._load_image(img_path)
+            # Cargar (si no viene ya decodificada) y preprocesar imagen
+            img = image if image is not None else self._load_image(img_path)
             img = self._preprocess_image(img)
             
             # Calcular perfil térmico vertical (promedio horizontal por fila)
@@ -144,15 +146,20 @@ class ThermalAnalyzer:
         try:
             import matplotlib.pyplot as plt
             
+            # Cargar la imagen una sola vez: se usa para detectar y para visualizar
+            # (si no existe o no se puede decodificar, process_image informa el status)
+            try:
+                img = self._load_image(img_path) if os.path.exists(img_path) else None
+            except ValueError:
+                img = None
+            
             # Procesar imagen
-            features = self.process_image(img_path)
+            features = self.process_image(img_path, image=img)
             
             if features.get('status') != 'success':
                 print(f"No se pudieron detectar interfaces: {features.get('status')}")
                 return
             
-            # Cargar imagen original para visualización
-            img = self._load_image(img_path)
             img_processed = self._preprocess_image(img)
             
             # Obtener posiciones de interfaces
@@ -219,15 +226,10 @@ class ThermalAnalyzer:
         Returns:
             np.ndarray: Imagen en escala de grises, redimensionada.
         """
-        # Intentar cargar como grayscale primero
+        # Decodificar directamente a grayscale (las imágenes RGB se convierten
+        # en el propio decodificador, sin pasar por BGR + cvtColor)
         img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
         
-        # Si falla, cargar como color y convertir
-        if img is None:
-            img = cv2.imread(path)
-            if img is not None:
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
         if img is None:
             raise ValueError(f"No se pudo cargar la imagen: {path}")
         
@@ -22,10 +22,6 @@ import os
 import yaml
 from pathlib import Path
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import pearsonr
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -77,8 +73,12 @@ def cargar_datos_procesados(csv_path):
     print(f"\n📊 Cargando datos desde: {csv_path}")
     
     try:
-        df = pd.read_csv(csv_path, encoding='utf-8')
-        
+        # Parser multihilo de pyarrow si está disponible; si no, el de pandas
+        try:
+            df = pd.read_csv(csv_path, encoding='utf-8', engine='pyarrow')
+        except ImportError:
+            df = pd.read_csv(csv_path, encoding='utf-8')
+
         # Convertir columna Día a datetime
         if 'Día' in df.columns:
             df['Día'] = pd.to_datetime(df['Día'], errors='coerce')
@@ -126,51 +126,50 @@ def calcular_metricas_derivadas(df, config):
         alta = umbrales.get('alta', 0.7)
         media = umbrales.get('media', 0.4)
         
-        def clasificar_fiabilidad(conf):
-            if pd.isna(conf):
-                return 'desconocida'
-            elif conf >= alta:
-                return 'alta'
-            elif conf >= media:
-                return 'media'
-            else:
-                return 'baja'
-        
-        df['fiabilidad_categoria'] = df['fiabilidad_termica'].apply(clasificar_fiabilidad)
+        # Clasificación vectorizada (sin callback Python por fila), guardada
+        # como categórica para comparar códigos enteros en vez de strings
+        conf = df['fiabilidad_termica']
+        df['fiabilidad_categoria'] = pd.Categorical(
+            np.select(
+                [conf.isna(), conf >= alta, conf >= media],
+                ['desconocida', 'alta', 'media'],
+                default='baja'
+            ),
+            categories=['alta', 'media', 'baja', 'desconocida']
+        )
         print("   ✓ Fiabilidad térmica calculada")
     
     # 3. Estado operacional (LLENADO, DECANTACION, VACIADO)
     if 'Nivel TK %' in df.columns and 'Caudal' in df.columns:
         estados_config = config.get('estado_operacional', {})
+        llenado = estados_config.get('llenado', {})
+        vaciado = estados_config.get('vaciado', {})
+        decantacion = estados_config.get('decantacion', {})
         
-        def determinar_estado(row):
-            nivel = row.get('Nivel TK %', 0)
-            caudal = row.get('Caudal', 0)
-            
-            if pd.isna(nivel) or pd.isna(caudal):
-                return 'desconocido'
-            
+        nivel = df['Nivel TK %']
+        caudal = df['Caudal']
+        
+        # Condiciones evaluadas en orden de prioridad sobre columnas completas
+        condiciones = [
+            nivel.isna() | caudal.isna(),
             # LLENADO: nivel bajo-medio y caudal positivo alto
-            llenado = estados_config.get('llenado', {})
-            if nivel >= llenado.get('nivel_min', 20) and caudal >= llenado.get('caudal_min', 100):
-                return 'LLENADO'
-            
+            (nivel >= llenado.get('nivel_min', 20)) & (caudal >= llenado.get('caudal_min', 100)),
             # VACIADO: nivel medio-alto y caudal negativo
-            vaciado = estados_config.get('vaciado', {})
-            if nivel >= vaciado.get('nivel_min', 20) and caudal <= vaciado.get('caudal_max', -100):
-                return 'VACIADO'
-            
+            (nivel >= vaciado.get('nivel_min', 20)) & (caudal <= vaciado.get('caudal_max', -100)),
             # DECANTACION: nivel alto y caudal cerca de cero
-            decantacion = estados_config.get('decantacion', {})
-            if nivel >= decantacion.get('nivel_min', 50):
-                caudal_min = decantacion.get('caudal_min', -50)
-                caudal_max = decantacion.get('caudal_max', 50)
-                if caudal_min <= caudal <= caudal_max:
-                    return 'DECANTACION'
-            
-            return 'TRANSICION'
+            (nivel >= decantacion.get('nivel_min', 50))
+            & caudal.between(decantacion.get('caudal_min', -50), decantacion.get('caudal_max', 50)),
+        ]
         
-        df['estado_operacional'] = df.apply(determinar_estado, axis=1)
+        # Categorías en orden alfabético para conservar el orden del groupby
+        df['estado_operacional'] = pd.Categorical(
+            np.select(
+                condiciones,
+                ['desconocido', 'LLENADO', 'VACIADO', 'DECANTACION'],
+                default='TRANSICION'
+            ),
+            categories=['DECANTACION', 'LLENADO', 'TRANSICION', 'VACIADO', 'desconocido']
+        )
         print("   ✓ Estado operacional determinado")
     
     # 4. Validar proporciones según umbrales
@@ -194,6 +193,59 @@ def calcular_metricas_derivadas(df, config):
 # ANÁLISIS DE CORRELACIONES
 # ============================================================================
 
+def correlaciones_pearson(X, Y):
+    """
+    Calcula la correlación de Pearson entre cada columna de X y cada columna de Y.
+    
+    Usa, para cada pareja, solo las filas donde ambas columnas son válidas
+    (igual que aplicar pearsonr pareja a pareja), pero resuelve todas las
+    sumas necesarias con productos matriciales en lugar de un bucle Python.
+    
+    Args:
+        X (np.ndarray): Matriz (N, K) de variables, puede contener NaN.
+        Y (np.ndarray): Matriz (N, S) de variables, puede contener NaN.
+    
+    Returns:
+        tuple: (r, p_values, n), matrices (K, S) con la correlación, su p-valor
+            bilateral y el número de puntos válidos de cada pareja.
+    """
+    # Import diferido: scipy solo se necesita en este paso
+    from scipy.stats import t as t_student
+    
+    # Centrar por columna reduce la cancelación numérica de las sumas
+    # (Pearson es invariante a traslaciones)
+    validos_x = ~np.isnan(X)
+    validos_y = ~np.isnan(Y)
+    X0 = np.where(validos_x, X - np.nanmean(X, axis=0), 0.0)
+    Y0 = np.where(validos_y, Y - np.nanmean(Y, axis=0), 0.0)
+    mx = validos_x.astype(np.float64)
+    my = validos_y.astype(np.float64)
+    
+    # Sumas restringidas a las filas válidas de cada pareja
+    n = mx.T @ my
+    sx = X0.T @ my
+    sy = mx.T @ Y0
+    sxx = (X0 * X0).T @ my
+    syy = mx.T @ (Y0 * Y0)
+    sxy = X0.T @ Y0
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        
+        # Parejas sin varianza (datos constantes) no tienen correlación definida
+        constante = (var_x <= 1e-12 * n * sxx) | (var_y <= 1e-12 * n * syy)
+        
+        r = (n * sxy - sx * sy) / np.sqrt(var_x * var_y)
+        r = np.where(constante, np.nan, np.clip(r, -1.0, 1.0))
+        
+        # Contraste t bilateral con n-2 grados de libertad
+        dof = n - 2
+        t = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+        p_values = 2 * t_student.sf(np.abs(t), dof)
+    
+    return r, p_values, n
+
 def analizar_correlaciones(df, config):
     """
     Analiza correlaciones entre proporciones térmicas y variables operativas/meteorológicas.
@@ -208,7 +260,7 @@ def analizar_correlaciones(df, config):
     print("\n📈 Analizando correlaciones...")
     
     # Filtrar solo registros con status 'success'
-    df_validos = df[df['status'] == 'success'].copy()
+    df_validos = df.query("status == 'success'")
     
     if len(df_validos) == 0:
         print("   ⚠ No hay registros válidos para análisis")
@@ -244,35 +296,29 @@ def analizar_correlaciones(df, config):
     correlaciones = {}
     umbral_min = config.get('analisis', {}).get('correlacion_minima', 0.3)
     
-    for var_termica in vars_termicas:
-        if var_termica not in df_validos.columns:
-            continue
-        
+    termicas = [var for var in vars_termicas if var in df_validos.columns]
+    variables = [var for var in todas_vars if var in df_validos.columns]
+    
+    # Todas las parejas (térmica, variable) en una sola pasada matricial
+    r, p_values, n = correlaciones_pearson(
+        df_validos[termicas].to_numpy(dtype=np.float64),
+        df_validos[variables].to_numpy(dtype=np.float64)
+    )
+    
+    for i, var_termica in enumerate(termicas):
         correlaciones[var_termica] = {}
         
-        for var in todas_vars:
-            if var not in df_validos.columns:
+        for j, var in enumerate(variables):
+            # Mínimo 3 puntos válidos para correlación
+            if n[i, j] < 3 or np.isnan(r[i, j]):
                 continue
             
-            # Filtrar valores válidos
-            mask = df_validos[[var_termica, var]].notna().all(axis=1)
-            if mask.sum() < 3:  # Mínimo 3 puntos para correlación
-                continue
-            
-            try:
-                corr, p_value = pearsonr(
-                    df_validos.loc[mask, var_termica],
-                    df_validos.loc[mask, var]
-                )
-                
-                if abs(corr) >= umbral_min:
-                    correlaciones[var_termica][var] = {
-                        'correlacion': round(corr, 3),
-                        'p_value': round(p_value, 4),
-                        'significativa': p_value < 0.05
-                    }
-            except Exception as e:
-                continue
+            if abs(r[i, j]) >= umbral_min:
+                correlaciones[var_termica][var] = {
+                    'correlacion': round(r[i, j], 3),
+                    'p_value': round(p_values[i, j], 4),
+                    'significativa': p_values[i, j] < 0.05
+                }
     
     # Mostrar correlaciones significativas
     print(f"   ✓ Correlaciones analizadas")
@@ -299,7 +345,7 @@ def detectar_tendencias(df, config):
     """
     print("\n📊 Detectando tendencias...")
     
-    df_validos = df[df['status'] == 'success'].copy()
+    df_validos = df.query("status == 'success'")
     
     if len(df_validos) < 3:
         print("   ⚠ Insuficientes datos para detectar tendencias")
@@ -317,19 +363,20 @@ def detectar_tendencias(df, config):
         if ratio_col not in df_validos.columns:
             continue
         
-        valores = df_validos[ratio_col].values
-        cambios = []
-        
-        # Calcular cambios en ventana móvil
-        for i in range(window, len(valores)):
-            ventana_anterior = valores[i-window:i]
-            ventana_actual = valores[i-window+1:i+1]
-            
-            if np.all(~np.isnan(ventana_anterior)) and np.all(~np.isnan(ventana_actual)):
-                cambio = np.mean(ventana_actual) - np.mean(ventana_anterior)
-                cambios.append(cambio)
-        
-        if cambios:
+        valores = df_validos[ratio_col].to_numpy(dtype=np.float64)
+
+        # Calcular cambios en ventana móvil: la media de la ventana actual
+        # [i-window+1, i] menos la de la anterior [i-window, i-1] se reduce a
+        # (valores[i] - valores[i-window]) / window
+        fin = np.arange(window, len(valores))
+
+        # Conteo acumulado de NaN: descarta en O(1) las ventanas con huecos
+        nan_csum = np.concatenate([[0], np.cumsum(np.isnan(valores))])
+        ventanas_completas = (nan_csum[fin + 1] - nan_csum[fin - window]) == 0
+
+        cambios = ((valores[fin] - valores[fin - window]) / window)[ventanas_completas]
+
+        if cambios.size > 0:
             cambio_promedio = np.mean(cambios)
             cambio_std = np.std(cambios)
             
@@ -370,7 +417,7 @@ def calcular_metricas_agregadas(df, config):
     """
     print("\n📊 Calculando métricas agregadas...")
     
-    df_validos = df[df['status'] == 'success'].copy()
+    df_validos = df.query("status == 'success'")
     
     if len(df_validos) == 0:
         return {}
@@ -394,7 +441,7 @@ def calcular_metricas_agregadas(df, config):
     
     # 2. Por estado operacional
     if 'estado_operacional' in df_validos.columns:
-        metricas_por_estado = df_validos.groupby('estado_operacional').agg({
+        metricas_por_estado = df_validos.groupby('estado_operacional', observed=True).agg({
             'thermal_crudo_ratio': ['mean', 'std', 'count'],
             'thermal_emulsion_ratio': ['mean', 'std', 'count'],
             'thermal_agua_ratio': ['mean', 'std', 'count'],
@@ -434,12 +481,15 @@ def generar_visualizaciones(df, correlaciones, tendencias, metricas, config):
     if guardar:
         os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    df_validos = df[df['status'] == 'success'].copy()
+    df_validos = df.query("status == 'success'")
     
     if len(df_validos) == 0:
         print("   ⚠ No hay datos válidos para visualizar")
         return
     
+    # Import diferido: matplotlib es costoso de cargar y solo se usa aquí
+    import matplotlib.pyplot as plt
+    
     # 1. Series temporales de proporciones vs temperatura
     if 'Día' in df_validos.columns:
         fig, axes = plt.subplots(2, 1, figsize=(14, 10))
@@ -525,10 +575,17 @@ def generar_visualizaciones(df, correlaciones, tendencias, metricas, config):
             ratios = ['thermal_crudo_ratio', 'thermal_emulsion_ratio', 'thermal_agua_ratio']
             nombres = ['Crudo', 'Emulsión', 'Agua']
             
+            # Máscaras por estado calculadas una sola vez comparando códigos
+            # enteros de la categoría en lugar de strings fila a fila
+            estado_cat = df_validos['estado_operacional'].astype('category')
+            codigos = estado_cat.cat.codes.to_numpy()
+            categorias = estado_cat.cat.categories
+            mascaras = [codigos == categorias.get_loc(estado) for estado in estados_validos]
+            
             for idx, (ratio, nombre) in enumerate(zip(ratios, nombres)):
                 if ratio in df_validos.columns:
-                    data_plot = [df_validos[df_validos['estado_operacional'] == estado][ratio].dropna().values 
-                                for estado in estados_validos]
+                    valores = df_validos[ratio].to_numpy(dtype=np.float64)
+                    data_plot = [valores[mascara & ~np.isnan(valores)] for mascara in mascaras]
                     
                     axes[idx].boxplot(data_plot, labels=estados_validos)
                     axes[idx].set_ylabel('Proporción', fontsize=11)
@@ -564,7 +621,18 @@ def generar_resumen_interpretativo(df, correlaciones, tendencias, metricas, conf
     """
     print("\n📝 Generando resumen interpretativo...")
     
-    df_validos = df[df['status'] == 'success'].copy()
+    df_validos = df.query("status == 'success'")
+    
+    # Medias de todas las columnas usadas en el resumen, en una sola pasada
+    columnas_media = [
+        col for col in ['fiabilidad_termica', 'Velocidad Viento', 'Radiación Solar',
+                        'thermal_agua_ratio', 'thermal_emulsion_ratio']
+        if col in df_validos.columns
+    ]
+    medias = dict(zip(
+        columnas_media,
+        np.nanmean(df_validos[columnas_media].to_numpy(dtype=np.float64), axis=0)
+    ))
     
     resumen = []
     resumen.append("="*80)
@@ -577,7 +645,7 @@ def generar_resumen_interpretativo(df, correlaciones, tendencias, metricas, conf
     resumen.append("-" * 80)
     
     if 'fiabilidad_termica' in df_validos.columns:
-        fiabilidad_promedio = df_validos['fiabilidad_termica'].mean()
+        fiabilidad_promedio = medias['fiabilidad_termica']
         fiabilidad_std = df_validos['fiabilidad_termica'].std()
         
         umbrales = config.get('fiabilidad_termica', {})
@@ -591,7 +659,7 @@ def generar_resumen_interpretativo(df, correlaciones, tendencias, metricas, conf
             resumen.append("   • CONCLUSIÓN: Fiabilidad moderada-baja. Revisar calibración.")
         
         if 'fiabilidad_categoria' in df_validos.columns:
-            distrib = df_validos['fiabilidad_categoria'].value_counts()
+            distrib = df_validos['fiabilidad_categoria'].astype(object).value_counts()
             resumen.append(f"   • Distribución: {dict(distrib)}")
     else:
         resumen.append("   • No se pudo calcular la fiabilidad (falta thermal_interface_confidence)")
@@ -643,7 +711,7 @@ def generar_resumen_interpretativo(df, correlaciones, tendencias, metricas, conf
     meteo_config = config.get('meteorologia', {})
     
     if 'Velocidad Viento' in df_validos.columns:
-        viento_promedio = df_validos['Velocidad Viento'].mean()
+        viento_promedio = medias['Velocidad Viento']
         viento_alto = meteo_config.get('viento', {}).get('alto', 3.0)
         
         if viento_promedio > viento_alto:
@@ -651,7 +719,7 @@ def generar_resumen_interpretativo(df, correlaciones, tendencias, metricas, conf
             resumen.append("     → Puede afectar la separación térmica y crear turbulencia")
     
     if 'Radiación Solar' in df_validos.columns:
-        radiacion_promedio = df_validos['Radiación Solar'].mean()
+        radiacion_promedio = medias['Radiación Solar']
         radiacion_alta = meteo_config.get('radiacion_solar', {}).get('alta', 400.0)
         
         if radiacion_promedio > radiacion_alta:
@@ -680,13 +748,13 @@ def generar_resumen_interpretativo(df, correlaciones, tendencias, metricas, conf
     problemas = []
     
     if 'thermal_agua_ratio' in df_validos.columns:
-        agua_promedio = df_validos['thermal_agua_ratio'].mean()
+        agua_promedio = medias['thermal_agua_ratio']
         umbral_agua = config.get('umbrales_proporciones', {}).get('agua', {}).get('maximo', 0.3)
         if agua_promedio > umbral_agua:
             problemas.append(f"Acumulación de agua alta ({agua_promedio:.2%} > {umbral_agua:.2%})")
     
     if 'thermal_emulsion_ratio' in df_validos.columns:
-        emulsion_promedio = df_validos['thermal_emulsion_ratio'].mean()
+        emulsion_promedio = medias['thermal_emulsion_ratio']
         umbral_emulsion = config.get('umbrales_proporciones', {}).get('emulsion', {}).get('maximo', 0.6)
         if emulsion_promedio > umbral_emulsion:
             problemas.append(f"Emulsión alta ({emulsion_promedio:.2%} > {umbral_emulsion:.2%})")
@@ -729,9 +797,16 @@ def exportar_resultados(df, correlaciones, tendencias, metricas, resumen, config
     
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    # 1. DataFrame completo con métricas
-    output_file = OUTPUT_DIR / 'analisis_completo.csv'
-    df.to_csv(output_file, index=False, encoding='utf-8')
+    # 1. DataFrame completo con métricas (Parquet: binario columnar, más rápido
+    #    y compacto que CSV; los CSV se reservan para las tablas pequeñas)
+    output_file = OUTPUT_DIR / 'analisis_completo.parquet'
+    try:
+        df.to_parquet(output_file, engine='pyarrow', index=False,
+                      compression='zstd', compression_level=3)
+    except ImportError:
+        print("   ⚠ pyarrow no está instalado. Instala con: pip install pyarrow")
+        output_file = OUTPUT_DIR / 'analisis_completo.csv'
+        df.to_csv(output_file, index=False, encoding='utf-8')
     print(f"   ✓ Datos completos: {output_file}")
     
     # 2. Correlaciones